@@ -6,6 +6,7 @@
 # Uso:
 #     python ean_history_search_v4.py <número_ean>
 
+import io
 import os
 import sys
 import json
@@ -14,16 +15,31 @@ import argparse
 import re
 import csv
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
+import itertools
 import random
-from functools import wraps
+import queue
+import threading
+from functools import partial, wraps
 
 try:
-    from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+    from tenacity import retry, stop_after_attempt, stop_when_event_set, wait_exponential, retry_if_exception_type
 except ImportError:
     retry = None  # fallback si tenacity no está instalado
 
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None  # sin caché en disco si requests-cache no está instalado
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"  # parser de la librería estándar si lxml no está instalado
+
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 import concurrent.futures
@@ -47,8 +63,30 @@ USER_AGENTS = [
 def get_random_user_agent():
     return random.choice(USER_AGENTS)
 
-def retry_on_exception(max_attempts=3):
-    """Decorador simple de reintentos con backoff exponencial."""
+# Errores de red transitorios: los únicos que merece la pena reintentar
+TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError
+)
+
+def literal_finditer(text: str, needle: str):
+    """
+    Genera las posiciones (inicio, fin) de `needle` en `text` que no estén pegadas a
+    otro dígito, es decir, que no formen parte de un número más largo. A diferencia de
+    r'\b', acepta letras adyacentes (p. ej. "EAN8410297112041"). Usa str.find, mucho
+    más rápido que el motor de regex para un literal.
+    """
+    size = len(needle)
+    i = text.find(needle)
+    while i >= 0:
+        end = i + size
+        if (i == 0 or not text[i - 1].isdigit()) and (end == len(text) or not text[end].isdigit()):
+            yield i, end
+        i = text.find(needle, end)
+
+def retry_on_exception(max_attempts=3, exceptions=TRANSIENT_ERRORS, stop_event: Optional[threading.Event] = None):
+    """Decorador simple de reintentos con backoff exponencial (deja de reintentar si se activa stop_event)."""
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -56,9 +94,12 @@ def retry_on_exception(max_attempts=3):
             for attempt in range(max_attempts):
                 try:
                     return func(*args, **kwargs)
-                except Exception as e:
-                    if attempt == max_attempts - 1:
+                except exceptions as e:
+                    if attempt == max_attempts - 1 or (stop_event is not None and stop_event.is_set()):
                         raise
+                    if stop_event is not None:
+                        stop_event.wait(delay)
+                        continue
                     time.sleep(delay)
                     delay *= 2
         return wrapper
@@ -66,27 +107,150 @@ def retry_on_exception(max_attempts=3):
 
 # Configuración de búsqueda
 MAX_RESULTS = 10
+MAX_FINDINGS_PER_URL = 10  # tope de hallazgos guardados por página analizada
+SNIPPET_PREVIEW_LENGTH = 200  # caracteres del fragmento mostrados en el informe
 SEARCH_TIMEOUT = 30  # segundos
+MAX_CONTENT_BYTES = 512_000  # tope de HTML descargado por página analizada
+CACHE_NAME = ".ean_cache"  # base SQLite para respuestas HTTP cacheadas
+CACHE_EXPIRE = 86400  # segundos (1 día)
+MAX_WORKERS = 16  # solicitudes HTTP simultáneas (trabajo limitado por E/S)
+GOOGLE_HEDGE_DELAY = 5  # segundos de espera a un dominio de Google antes de probar el siguiente
+
+# Configuración del pool de conexiones HTTP (keep-alive entre búsquedas paralelas)
+POOL_CONNECTIONS = 32  # número de hosts con pool propio
+POOL_MAXSIZE = 64  # conexiones reutilizables por host
+
+# Columnas del CSV de resultados
+CSV_FIELDNAMES = ("EAN", "URL", "Producto", "Pista_Temporal", "Evaluacion", "Fragmento")
+CSV_BUFFER_SIZE = 1024 * 1024  # bytes acumulados antes de escribir el CSV en disco
+CSV_DIALECT = "ean"
+
+# Comillas solo cuando hacen falta y fin de línea "\n" (sin conversión a "\r\n")
+csv.register_dialect(CSV_DIALECT, quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+
+# Grupos del informe, en orden de presentación: (encabezado, evaluación del hallazgo)
+REPORT_SECTIONS = (
+    ("HALLAZGOS HISTÓRICOS", "Histórico"),
+    ("HALLAZGOS ACTUALES", "Actual"),
+    ("HALLAZGOS INDETERMINADOS", "Indeterminado"),
+    ("HALLAZGOS DE OPENFOODFACTS", "OFProduct"),
+    ("HALLAZGOS DE WAYBACK MACHINE", "Wayback"),
+    ("HALLAZGOS DE AMAZON", "Amazon")
+)
+
+# Selectores CSS de los resultados de Google (los nombres de clase cambian con el tiempo).
+# Se combinan con comas para resolverlos en un solo recorrido del árbol
+GOOGLE_RESULT_SELECTOR = "div.g, div.tF2Cxc, div.yuRUbf, div.rc"
+GOOGLE_SNIPPET_SELECTOR = "div.VwiC3b, div.IsZvec, span.st, div.s"
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+LOG_BUFFER_SIZE = 64 * 1024  # bytes acumulados antes de escribir el archivo de log
+
+class BufferedFileHandler(logging.StreamHandler):
+    """
+    Handler de archivo que acumula los registros en un búfer y solo escribe en disco
+    cuando este se llena o al cerrar el handler (logging.shutdown se ejecuta al salir).
+    """
+    
+    def __init__(self, filename: str, encoding: str = "utf-8", buffer_size: int = LOG_BUFFER_SIZE):
+        stream = io.TextIOWrapper(open(filename, "ab", buffering=buffer_size), encoding=encoding)
+        super().__init__(stream)
+    
+    def flush(self):
+        # No vaciar tras cada registro; el búfer se vuelca al llenarse o en close()
+        pass
+    
+    def close(self):
+        self.acquire()
+        try:
+            try:
+                self.stream.close()
+            finally:
+                super().close()
+        finally:
+            self.release()
 
 class EANHistoryFinder:
     """Clase principal para buscar información histórica de EANs."""
+
+    # Patrones de análisis de contenido (compilados una sola vez, no dependen del EAN)
+    _PRODUCT_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+        r'(?:producto|artículo|item|product|item)[\s:]+([^\n\.]{5,50})',
+        r'(?:nombre|título|name|title)[\s:]+([^\n\.]{5,50})',
+        r'(?:modelo|referencia|model|reference)[\s:]+([^\n\.]{5,50})',
+        r'(?:descripción|description)[\s:]+([^\n\.]{5,50})',
+        r'(?:^|(?<=[\n\.]))([A-Z][^\n\.]{5,50})',  # Frases que comienzan con mayúscula
+        r'(?:^|(?<=[\n\.]))([^a-z\n\.]{5,50})'       # Texto en mayúsculas
+    ))
+
+    _DATE_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+        r'(?:año|modelo|year|model)[\s:]+(\d{4})',
+        r'(?:versión|edición|version|edition)[\s:]+([^\n\.]{5,30})',
+        r'(?:descatalogado|discontinuado|obsoleto|discontinued|obsolete)',
+        r'(?:anterior|previo|antiguo|previous|old|former)',
+        r'(?:desde|hasta|entre|from|to|between)[\s:]+(\d{4})',
+        r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',  # Fechas en formato DD/MM/YYYY o similar
+        r'(\d{4}[/-]\d{1,2}[/-]\d{1,2})',  # Fechas en formato YYYY/MM/DD o similar
+        r'(?:enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre)[\s,]+(\d{4})',  # Meses en español + año
+        r'(?:january|february|march|april|may|june|july|august|september|october|november|december)[\s,]+(\d{4})'  # Meses en inglés + año
+    ))
+
+    _HISTORICAL_INDICATORS = tuple(re.compile(p, re.IGNORECASE) for p in (
+        r'(?:descatalogado|discontinuado|obsoleto|discontinued|obsolete)',
+        r'(?:ya no|no disponible|not available|no longer)',
+        r'(?:versión anterior|modelo antiguo|previous version|old model)',
+        r'(?:reemplazado por|sustituido por|replaced by|substituted by)',
+        r'(?:histórico|historia|pasado|historic|history|past)',
+        r'(?:fue|era|was|were)',
+        r'(?:antiguo|antigüedad|antique|vintage)',
+        r'(?:colección|collection) (?:pasada|anterior|old)'
+    ))
+
+    _CURRENT_INDICATORS = tuple(re.compile(p, re.IGNORECASE) for p in (
+        r'(?:nuevo|actual|vigente|new|current)',
+        r'(?:disponible|en stock|available|in stock)',
+        r'(?:versión actual|último modelo|current version|latest model)',
+        r'(?:reciente|recién|recent|recently)',
+        r'(?:comprar|compra ahora|buy|buy now)',
+        r'(?:añadir al carrito|add to cart)',
+        r'(?:precio actual|current price)',
+        r'(?:envío|shipping) (?:gratis|gratuito|free)'
+    ))
+
+    # Unión de todos los indicadores, solo como filtro previo: si no encuentra nada,
+    # ningún indicador aparece en el contexto y ambos puntajes son 0. El conteo se hace
+    # siempre patrón a patrón, porque en la unión una coincidencia puede ocultar a otra
+    _ANY_INDICATOR_RE = re.compile(
+        "|".join(p.pattern for p in _HISTORICAL_INDICATORS + _CURRENT_INDICATORS),
+        re.IGNORECASE
+    )
+
+    _TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+    _WHITESPACE_RE = re.compile(r'\s+')
+    # Saltos de línea (los mismos que reconoce str.splitlines) o dos o más espacios seguidos
+    # separan fragmentos de texto
+    _LINE_BREAK_RE = re.compile(r'\s*(?:[\n\r\v\f\x1c-\x1e\x85\u2028\u2029]|  )\s*')
     
-    def __init__(self, ean: str, proxies: Optional[List[str]] = None, max_results: int = MAX_RESULTS, lang: str = "es"):
+    def __init__(self, ean: str, proxies: Optional[List[str]] = None, max_results: int = MAX_RESULTS, lang: str = "es", use_cache: bool = True,
+                 max_findings_per_url: int = MAX_FINDINGS_PER_URL):
         """
         Inicializa el buscador con un número EAN específico.
         
         Args:
             ean (str): El número EAN a buscar.
+            use_cache (bool): Reutilizar respuestas HTTP cacheadas en disco (requiere requests-cache).
+            max_findings_per_url (int): Máximo de hallazgos a extraer de una misma página.
         """
         self.ean = ean
         self.results = []
         self.max_results = max_results
+        self.max_findings_per_url = max_findings_per_url
         self.lang = lang
         self.proxies = proxies or []
         self.proxy_index = 0
+        # Directorio base para los CSV con ruta relativa (se consulta una sola vez)
+        self._cwd = os.getcwd()
         # Ampliar términos de búsqueda para mejorar resultados
         self.search_terms = [
             f"{ean}",  # Búsqueda directa del EAN
@@ -102,20 +266,40 @@ class EANHistoryFinder:
             f"EAN {ean}"  # Especificar que es un EAN
         ]
         # Añadir objeto Session para mayor eficiencia y robustez
-        self.session = requests.Session()
+        if use_cache and requests_cache:
+            self.session = requests_cache.CachedSession(
+                cache_name=CACHE_NAME,
+                backend="sqlite",
+                expire_after=CACHE_EXPIRE,
+                allowable_methods=("GET",)
+            )
+            # Las páginas analizadas se descargan sin caché: la caché leería el cuerpo completo
+            # (ignorando MAX_CONTENT_BYTES) y guardaría páginas enteras en disco
+            self.page_session = requests.Session()
+            self._sessions = (self.session, self.page_session)
+        else:
+            self.session = requests.Session()
+            self.page_session = self.session
+            self._sessions = (self.session,)
+        # Pool ampliado para que las conexiones keep-alive sobrevivan a la ráfaga de hilos
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+        for session in self._sessions:
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+                "Accept-Language": "es-ES,es;q=0.8,en-US;q=0.5,en;q=0.3",
+                "Referer": "https://www.google.com/",
+                "DNT": "1",
+                "Connection": "keep-alive",
+                "Upgrade-Insecure-Requests": "1"
+            })
         self.rotate_user_agent()
-        self.session.headers.update({
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-            "Accept-Language": "es-ES,es;q=0.8,en-US;q=0.5,en;q=0.3",
-            "Referer": "https://www.google.com/",
-            "DNT": "1",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1"
-        })
     
     def rotate_user_agent(self):
         ua = get_random_user_agent()
-        self.session.headers.update({"User-Agent": ua})
+        for session in self._sessions:
+            session.headers.update({"User-Agent": ua})
 
     def get_next_proxy(self):
         if not self.proxies:
@@ -124,24 +308,40 @@ class EANHistoryFinder:
         self.proxy_index += 1
         return {"http": proxy, "https": proxy}
 
-    # Decorador de reintentos (usa tenacity si está disponible)
-    def retryable(self, func):
+    # Decorador de reintentos (usa tenacity si está disponible); stop_event corta los reintentos pendientes
+    def retryable(self, func, stop_event: Optional[threading.Event] = None):
         if retry:
+            stop = stop_after_attempt(3)
+            extra = {}
+            if stop_event is not None:
+                stop = stop | stop_when_event_set(stop_event)
+                extra["sleep"] = stop_event.wait
             return retry(
-                stop=stop_after_attempt(3),
+                stop=stop,
                 wait=wait_exponential(multiplier=1, min=2, max=10),
-                retry=retry_if_exception_type((requests.RequestException,))
+                retry=retry_if_exception_type(TRANSIENT_ERRORS),
+                reraise=True,
+                **extra
             )(func)
         else:
-            return retry_on_exception(3)(func)
+            return retry_on_exception(3, stop_event=stop_event)(func)
 
-    def _request_with_retry(self, url, **kwargs):
-        # Rotar User-Agent y proxy en cada intento
-        self.rotate_user_agent()
-        proxy = self.get_next_proxy()
-        if proxy:
-            kwargs["proxies"] = proxy
-        return self.session.get(url, timeout=SEARCH_TIMEOUT, **kwargs)
+    def _request_with_retry(self, url, session: Optional[requests.Session] = None,
+                            stop_event: Optional[threading.Event] = None, **kwargs):
+        # Solo la solicitud HTTP se reintenta (errores de red transitorios);
+        # el parseo de la respuesta queda fuera para no repetir llamadas de red
+        @partial(self.retryable, stop_event=stop_event)
+        def _request():
+            # No lanzar un nuevo intento si ya no hace falta (p. ej. otro dominio de Google respondió)
+            if stop_event is not None and stop_event.is_set():
+                raise concurrent.futures.CancelledError()
+            # Rotar proxy en cada intento; el User-Agent se fija una vez por sesión
+            # para no alterar las cabeceras compartidas entre hilos
+            proxy = self.get_next_proxy()
+            if proxy:
+                kwargs["proxies"] = proxy
+            return (session or self.session).get(url, timeout=SEARCH_TIMEOUT, **kwargs)
+        return _request()
     
     def validate_ean(self) -> bool:
         """
@@ -173,74 +373,108 @@ class EANHistoryFinder:
         # Para otros formatos, simplemente aceptamos si tienen la longitud correcta
         return True
     
-    def search_with_requests(self, query: str) -> List[Dict]:
+    def search_with_requests(self, query: str,
+                             executor: Optional[concurrent.futures.ThreadPoolExecutor] = None) -> List[Dict]:
         """
-        Busca en Google utilizando requests y BeautifulSoup, con reintentos y rotación de User-Agent/proxy.
+        Busca en Google utilizando requests y BeautifulSoup, con reintentos y rotación de proxy
+        (el User-Agent se elige una vez por sesión).
+        Consulta google.com y solo recurre a los demás dominios de Google si falla, no devuelve
+        resultados o tarda más de GOOGLE_HEDGE_DELAY segundos; se queda con el primero que responde
+        con resultados y detiene el resto.
+        
+        Args:
+            query (str): Consulta a buscar.
+            executor (ThreadPoolExecutor): Pool para consultar los dominios; si no se indica,
+                se crea uno solo para esta búsqueda.
         """
-        @self.retryable
-        def _search():
-            encoded_query = requests.utils.quote(query)
-            google_domains = [
-                f"https://www.google.com/search?hl={self.lang}",
-                f"https://www.google.es/search?hl={self.lang}",
-                f"https://www.google.com.mx/search?hl={self.lang}"
-            ]
-            results = []
+        google_domains = [
+            "https://www.google.com/search",
+            "https://www.google.es/search",
+            "https://www.google.com.mx/search"
+        ]
+        # requests codifica la consulta al construir la URL
+        params = {"hl": self.lang, "q": query, "num": self.max_results}
+        own_executor = executor is None
+        if own_executor:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(google_domains))
+        # Se activa al terminar para que los dominios aún en curso dejen de reintentar
+        stop_event = threading.Event()
+        results = []
+        pending = set()
+        try:
             for domain in google_domains:
-                url = f"{domain}&q={encoded_query}&num={self.max_results}"
-                try:
-                    response = self._request_with_retry(url)
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.text, "html.parser")
-                        selectors = ["div.g", "div.tF2Cxc", "div.yuRUbf", "div.rc"]
-                        search_results = []
-                        for selector in selectors:
-                            search_results = soup.select(selector)
-                            if search_results:
-                                break
-                        if not search_results:
-                            search_results = soup.find_all("a", href=lambda href: href and href.startswith("http") and "google" not in href)
-                        domain_results = []
-                        if search_results:
-                            for result in search_results:
-                                try:
-                                    if selector in selectors[:4]:
-                                        title_element = result.select_one("h3")
-                                        title = title_element.get_text() if title_element else "Sin título"
-                                        link_element = result.select_one("a")
-                                        link = link_element["href"] if link_element and "href" in link_element.attrs else ""
-                                        snippet = ""
-                                        snippet_selectors = ["div.VwiC3b", "div.IsZvec", "span.st", "div.s"]
-                                        for s_selector in snippet_selectors:
-                                            snippet_element = result.select_one(s_selector)
-                                            if snippet_element:
-                                                snippet = snippet_element.get_text()
-                                                break
-                                    else:
-                                        title = result.get_text() or "Sin título"
-                                        link = result["href"]
-                                        snippet = ""
-                                    if link and link.startswith("http") and "google" not in link:
-                                        domain_results.append({
-                                            "title": title,
-                                            "link": link,
-                                            "snippet": snippet
-                                        })
-                                except Exception as e:
-                                    continue
-                        if domain_results:
-                            results.extend(domain_results)
-                            break
-                except Exception as e:
-                    continue
-            unique_results = []
-            seen_urls = set()
-            for result in results:
-                if result["link"] not in seen_urls:
-                    seen_urls.add(result["link"])
-                    unique_results.append(result)
-            return unique_results
-        return _search()
+                pending.add(executor.submit(self._search_google_domain, domain, params, stop_event))
+                done, pending = concurrent.futures.wait(
+                    pending, timeout=GOOGLE_HEDGE_DELAY, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                results = next((future.result() for future in done if future.result()), [])
+                if results:
+                    break
+            else:
+                # Todos los dominios consultados sin éxito todavía: esperar a los que siguen en curso
+                for future in concurrent.futures.as_completed(pending):
+                    if future.result():
+                        results = future.result()
+                        break
+        finally:
+            # Detener los dominios perdedores: los que no han empezado se cancelan
+            # y los que están en curso no lanzan más intentos
+            stop_event.set()
+            for future in pending:
+                future.cancel()
+            if own_executor:
+                executor.shutdown(wait=False)
+        unique_results = []
+        seen_urls = set()
+        for result in results:
+            if result["link"] not in seen_urls:
+                seen_urls.add(result["link"])
+                unique_results.append(result)
+        return unique_results
+
+    def _search_google_domain(self, url: str, params: Dict[str, Any],
+                              stop_event: Optional[threading.Event] = None) -> List[Dict]:
+        """
+        Obtiene y parsea una página de resultados de un dominio de Google.
+        
+        Returns:
+            List[Dict]: Resultados (título, enlace, snippet) o lista vacía si falla.
+        """
+        domain_results = []
+        try:
+            response = self._request_with_retry(url, stop_event=stop_event, params=params)
+            if response.status_code == 200:
+                soup = BeautifulSoup(response.text, HTML_PARSER)
+                search_results = soup.select(GOOGLE_RESULT_SELECTOR)
+                # Resultados estructurados si algún selector coincidió; si no, enlaces sueltos
+                use_structured = bool(search_results)
+                if not use_structured:
+                    search_results = soup.find_all("a", href=lambda href: href and href.startswith("http") and "google" not in href)
+                if search_results:
+                    for result in search_results:
+                        try:
+                            if use_structured:
+                                title_element = result.select_one("h3")
+                                title = title_element.get_text() if title_element else "Sin título"
+                                link_element = result.select_one("a")
+                                link = link_element["href"] if link_element and "href" in link_element.attrs else ""
+                                snippet_element = result.select_one(GOOGLE_SNIPPET_SELECTOR)
+                                snippet = snippet_element.get_text() if snippet_element else ""
+                            else:
+                                title = result.get_text() or "Sin título"
+                                link = result["href"]
+                                snippet = ""
+                            if link and link.startswith("http") and "google" not in link:
+                                domain_results.append({
+                                    "title": title,
+                                    "link": link,
+                                    "snippet": snippet
+                                })
+                        except Exception as e:
+                            continue
+        except Exception as e:
+            logging.debug(f"Error en búsqueda en {url}: {str(e)}")
+        return domain_results
 
     def search_wayback_machine(self) -> Optional[Dict]:
         """
@@ -254,13 +488,15 @@ class EANHistoryFinder:
                 snapshots = data.get("archived_snapshots", {})
                 if "closest" in snapshots:
                     snap = snapshots["closest"]
+                    snippet = f"Snapshot de Google para EAN {self.ean}"
                     return {
                         "url": snap.get("url"),
                         "findings": [{
                             "product_name": "Wayback Snapshot",
                             "date_clue": snap.get("timestamp", "No identificado"),
                             "assessment": "Wayback",
-                            "snippet": f"Snapshot de Google para EAN {self.ean}",
+                            "snippet": snippet,
+                            "snippet_short": snippet[:SNIPPET_PREVIEW_LENGTH],
                             "url": snap.get("url")
                         }]
                     }
@@ -277,15 +513,17 @@ class EANHistoryFinder:
             # Solo obtener la página de resultados, no scrapea productos individuales
             response = self._request_with_retry(url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, "html.parser")
+                soup = BeautifulSoup(response.text, HTML_PARSER)
                 title = soup.title.get_text() if soup.title else "Amazon Search"
+                snippet = f"Resultados de búsqueda de Amazon para EAN {self.ean}"
                 return {
                     "url": url,
                     "findings": [{
                         "product_name": title,
                         "date_clue": "No identificado",
                         "assessment": "Amazon",
-                        "snippet": f"Resultados de búsqueda de Amazon para EAN {self.ean}",
+                        "snippet": snippet,
+                        "snippet_short": snippet[:SNIPPET_PREVIEW_LENGTH],
                         "url": url
                     }]
                 }
@@ -317,6 +555,7 @@ class EANHistoryFinder:
                         "date_clue": date_clue,
                         "assessment": "OFProduct",
                         "snippet": snippet,
+                        "snippet_short": snippet[:SNIPPET_PREVIEW_LENGTH],
                         "url": f"https://es.openfoodfacts.org/product/{self.ean}"
                     }
                     return {"url": f"https://es.openfoodfacts.org/product/{self.ean}", "findings": [finding]}
@@ -332,11 +571,19 @@ class EANHistoryFinder:
         """
         Realiza la búsqueda de información histórica del EAN, paralelizando la obtención de resultados de Google.
         """
-        all_results = []
+        return list(self.iter_search())
+
+    def iter_search(self) -> Iterator[Dict]:
+        """
+        Igual que search(), pero entrega cada resultado en cuanto termina su análisis,
+        para poder procesarlo (por ejemplo, guardarlo en CSV) mientras sigue la búsqueda.
+        """
+        relevant_urls = 0
+        total_findings = 0
         all_futures = []
         if not self.validate_ean():
             logging.error(f"Error: '{self.ean}' no es un número EAN válido.")
-            return []
+            return
         logging.info("\n" + "=" * 50)
         logging.info(f"BUSCADOR HISTÓRICO DE EANs (V2)")
         logging.info("=" * 50)
@@ -344,43 +591,79 @@ class EANHistoryFinder:
         logging.info(f"Formato: {'EAN-8' if len(self.ean) == 8 else 'EAN-13' if len(self.ean) == 13 else 'EAN-14' if len(self.ean) == 14 else 'Desconocido'}")
         logging.info("=" * 50)
         start_time = time.time()
-        # Paralelizar la obtención de resultados de Google
-        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-            # Búsqueda en fuentes externas
-            all_futures.append(executor.submit(self.search_openfoodfacts))
-            all_futures.append(executor.submit(self.search_wayback_machine))
-            all_futures.append(executor.submit(self.search_amazon))
-            # Paralelizar búsquedas de términos en Google
-            google_futures = {executor.submit(self.search_with_requests, term): term for term in self.search_terms}
-            url_analysis_futures = []
-            for future in concurrent.futures.as_completed(list(google_futures.keys())):
-                term = google_futures[future]
-                try:
-                    results = future.result()
-                    logging.info(f"Buscando: {term}... OK ({len(results)} resultados)")
-                    for result in results[:3]:
-                        url = result.get("link")
-                        if not url:
-                            continue
-                        url_analysis_futures.append(executor.submit(self._process_url, url))
-                except Exception as e:
-                    logging.error(f"Error en búsqueda de '{term}': {str(e)}")
-            # Analizar URLs encontradas
-            all_futures.extend(url_analysis_futures)
-            for future in concurrent.futures.as_completed(all_futures):
-                analysis = future.result()
-                if analysis and analysis.get("findings"):
-                    all_results.append(analysis)
+        search_terms = self._unique_search_terms()
+        # Pool para los dominios de Google de todas las búsquedas; se cierra sin esperar
+        # al terminar, ya que cada búsqueda detiene sus dominios perdedores
+        google_executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        try:
+            # Paralelizar la obtención de resultados de Google
+            with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                # Búsqueda en fuentes externas
+                all_futures.append(executor.submit(self.search_openfoodfacts))
+                all_futures.append(executor.submit(self.search_wayback_machine))
+                all_futures.append(executor.submit(self.search_amazon))
+                # Paralelizar búsquedas de términos en Google
+                google_futures = [executor.submit(self.search_with_requests, term, google_executor) for term in search_terms]
+                seen_urls = set()
+                seen_urls_lock = threading.Lock()
+                # Cada búsqueda de Google entrega aquí (exactamente una vez) sus análisis de URL encolados
+                queued_analyses = queue.Queue()
+
+                def queue_url_analysis(term, future):
+                    # Se ejecuta en cuanto termina la búsqueda del término, para que el análisis
+                    # de sus URLs empiece sin esperar al resto de búsquedas
+                    url_futures = []
+                    try:
+                        results = future.result()
+                        logging.info(f"Buscando: {term}... OK ({len(results)} resultados)")
+                        with seen_urls_lock:
+                            for result in results[:3]:
+                                url = result.get("link")
+                                if not url or url in seen_urls:
+                                    continue
+                                seen_urls.add(url)
+                                url_futures.append(executor.submit(self._process_url, url))
+                    except Exception as e:
+                        logging.error(f"Error en búsqueda de '{term}': {str(e)}")
+                    finally:
+                        queued_analyses.put(url_futures)
+
+                for term, future in zip(search_terms, google_futures):
+                    future.add_done_callback(partial(queue_url_analysis, term))
+                for _ in google_futures:
+                    all_futures.extend(queued_analyses.get())
+                # Recoger fuentes externas y análisis de URLs en una sola pasada
+                for future in concurrent.futures.as_completed(all_futures):
+                    analysis = future.result()
+                    if analysis and analysis.get("findings"):
+                        relevant_urls += 1
+                        total_findings += len(analysis["findings"])
+                        yield analysis
+        finally:
+            google_executor.shutdown(wait=False)
         execution_time = time.time() - start_time
         logging.info("\n" + "=" * 50)
         logging.info("ESTADÍSTICAS DE BÚSQUEDA")
         logging.info("=" * 50)
-        logging.info(f"Términos de búsqueda utilizados: {len(self.search_terms)}")
-        total_findings = sum(len(result["findings"]) for result in all_results)
+        logging.info(f"Términos de búsqueda utilizados: {len(search_terms)}")
         logging.info(f"Total de hallazgos: {total_findings}")
-        logging.info(f"URLs con información relevante: {len(all_results)}")
+        logging.info(f"URLs con información relevante: {relevant_urls}")
         logging.info(f"Tiempo de ejecución: {execution_time:.2f} segundos")
-        return all_results
+
+    def _unique_search_terms(self) -> List[str]:
+        """
+        Elimina términos de búsqueda equivalentes (mismas palabras en distinto orden),
+        conservando el orden de prioridad original.
+        """
+        seen_queries = set()
+        unique_terms = []
+        for term in self.search_terms:
+            canonical = tuple(sorted(term.lower().split()))
+            if canonical in seen_queries:
+                continue
+            seen_queries.add(canonical)
+            unique_terms.append(term)
+        return unique_terms
 
     def _process_url(self, url: str) -> Optional[Dict]:
         logging.info(f"Analizando: {url}...")
@@ -407,30 +690,39 @@ class EANHistoryFinder:
             str: El contenido extraído de la página o cadena vacía si hay un error.
         """
         try:
-            # Realizar la solicitud usando self.session
-            response = self._request_with_retry(url)
+            # Realizar la solicitud sin caché (self.page_session), descargando el cuerpo por partes
+            response = self._request_with_retry(url, session=self.page_session, stream=True)
             
-            # Verificar si la solicitud fue exitosa
-            if response.status_code == 200:
-                # Parsear el HTML
-                soup = BeautifulSoup(response.text, "html.parser")
-                
-                # Eliminar scripts y estilos
-                for script in soup(["script", "style"]):
-                    script.extract()
-                
-                # Obtener texto
-                text = soup.get_text()
-                
-                # Limpiar espacios en blanco
-                lines = (line.strip() for line in text.splitlines())
-                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                text = '\n'.join(chunk for chunk in chunks if chunk)
+            with response:
+                # Verificar si la solicitud fue exitosa
+                if response.status_code != 200:
+                    logging.error(f"Error al extraer contenido de {url}: Código de estado {response.status_code}")
+                    return ""
                 
-                return text
-            else:
-                logging.error(f"Error al extraer contenido de {url}: Código de estado {response.status_code}")
-                return ""
+                # Leer como máximo MAX_CONTENT_BYTES; el análisis solo usa ventanas alrededor del EAN
+                html = bytearray()
+                for chunk in response.iter_content(chunk_size=65536):
+                    html.extend(chunk)
+                    if len(html) >= MAX_CONTENT_BYTES:
+                        # Cortar tras el último '>' (ASCII) para no partir un carácter multibyte,
+                        # que haría a BeautifulSoup adivinar mal la codificación de toda la página
+                        cut = html.rfind(b">", 0, MAX_CONTENT_BYTES) + 1
+                        del html[cut or MAX_CONTENT_BYTES:]
+                        break
+                # Usar el charset declarado por el servidor; si no lo hay, BeautifulSoup lo detecta
+                declared_charset = "charset" in response.headers.get("Content-Type", "").lower()
+                encoding = response.encoding if declared_charset else None
+            
+            # Parsear el HTML
+            soup = BeautifulSoup(bytes(html), HTML_PARSER, from_encoding=encoding)
+            
+            # Eliminar scripts y estilos
+            for script in soup(["script", "style"]):
+                script.extract()
+            
+            # Obtener texto y limpiar espacios en blanco: cada línea o fragmento separado
+            # por dos o más espacios queda en su propia línea, sin líneas vacías
+            return self._LINE_BREAK_RE.sub("\n", soup.get_text()).strip()
                 
         except Exception as e:
             logging.error(f"Error al extraer contenido de {url}: {str(e)}")
@@ -447,137 +739,89 @@ class EANHistoryFinder:
         Returns:
             Optional[Dict]: Resultados del análisis o None si no se encuentra información relevante.
         """
-        if not content:
+        # Descartar de inmediato las páginas que no mencionan el EAN (caso más común)
+        if not content or self.ean not in content:
             return None
         
-        # Buscar menciones del EAN (con variaciones para mayor flexibilidad)
-        ean_patterns = [
-            re.compile(r'\b' + re.escape(self.ean) + r'\b'),  # EAN exacto
-            re.compile(r'EAN[\s:-]*' + re.escape(self.ean)),  # Con prefijo EAN
-            re.compile(r'código[\s:-]*' + re.escape(self.ean)),  # Con prefijo código
-            re.compile(r'barcode[\s:-]*' + re.escape(self.ean)),  # Con prefijo barcode
-            re.compile(r'UPC[\s:-]*' + re.escape(self.ean))  # Con prefijo UPC
-        ]
-        
         findings = []
+        seen_snippets = set()
+        last_span = None
         
-        # Buscar coincidencias con todos los patrones
-        for pattern in ean_patterns:
-            ean_matches = pattern.finditer(content)
+        # Título de la página: se busca una sola vez y se reutiliza en todos los hallazgos
+        title_match = self._TITLE_RE.search(content)
+        page_title = title_match.group(1).strip() if title_match else None
+        
+        # Buscar menciones del EAN (aisladas o tras un prefijo como "EAN:", "código", "UPC")
+        for match_start, match_end in literal_finditer(content, self.ean):
+            # Extraer contexto alrededor de la mención del EAN (800 caracteres para más contexto)
+            start = max(0, match_start - 400)
+            end = min(len(content), match_end + 400)
             
-            for match in ean_matches:
-                # Extraer contexto alrededor de la mención del EAN (800 caracteres para más contexto)
-                start = max(0, match.start() - 400)
-                end = min(len(content), match.end() + 400)
-                context = content[start:end]
-                
-                # Buscar nombre del producto con patrones ampliados
-                product_name = "No identificado"
-                product_patterns = [
-                    r'(?:producto|artículo|item|product|item)[\s:]+([^\n\.]{5,50})',
-                    r'(?:nombre|título|name|title)[\s:]+([^\n\.]{5,50})',
-                    r'(?:modelo|referencia|model|reference)[\s:]+([^\n\.]{5,50})',
-                    r'(?:descripción|description)[\s:]+([^\n\.]{5,50})',
-                    r'(?:^|(?<=[\n\.]))([A-Z][^\n\.]{5,50})',  # Frases que comienzan con mayúscula
-                    r'(?:^|(?<=[\n\.]))([^a-z\n\.]{5,50})'       # Texto en mayúsculas
-                ]
-                
-                for pattern in product_patterns:
-                    product_match = re.search(pattern, context, re.IGNORECASE)
-                    if product_match:
-                        product_name = product_match.group(1).strip()
-                        break
-                
-                # Si no se encontró un nombre de producto, intentar extraerlo del título de la página
-                if product_name == "No identificado" and "title" in content.lower():
-                    title_match = re.search(r'<title[^>]*>(.*?)</title>', content, re.IGNORECASE | re.DOTALL)
-                    if title_match:
-                        product_name = title_match.group(1).strip()
-                
-                # Buscar pistas temporales con patrones ampliados
-                date_clue = "No identificado"
-                date_patterns = [
-                    r'(?:año|modelo|year|model)[\s:]+(\d{4})',
-                    r'(?:versión|edición|version|edition)[\s:]+([^\n\.]{5,30})',
-                    r'(?:descatalogado|discontinuado|obsoleto|discontinued|obsolete)',
-                    r'(?:anterior|previo|antiguo|previous|old|former)',
-                    r'(?:desde|hasta|entre|from|to|between)[\s:]+(\d{4})',
-                    r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',  # Fechas en formato DD/MM/YYYY o similar
-                    r'(\d{4}[/-]\d{1,2}[/-]\d{1,2})',  # Fechas en formato YYYY/MM/DD o similar
-                    r'(?:enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre)[\s,]+(\d{4})',  # Meses en español + año
-                    r'(?:january|february|march|april|may|june|july|august|september|october|november|december)[\s,]+(\d{4})'  # Meses en inglés + año
-                ]
-                
-                for pattern in date_patterns:
-                    date_match = re.search(pattern, context, re.IGNORECASE)
-                    if date_match:
-                        if date_match.groups():
-                            date_clue = date_match.group(1).strip()
-                        else:
-                            date_clue = date_match.group(0).strip()
-                        break
-                
-                # Evaluar si es histórico con indicadores ampliados
-                assessment = "Indeterminado"
-                historical_indicators = [
-                    r'(?:descatalogado|discontinuado|obsoleto|discontinued|obsolete)',
-                    r'(?:ya no|no disponible|not available|no longer)',
-                    r'(?:versión anterior|modelo antiguo|previous version|old model)',
-                    r'(?:reemplazado por|sustituido por|replaced by|substituted by)',
-                    r'(?:histórico|historia|pasado|historic|history|past)',
-                    r'(?:fue|era|was|were)',
-                    r'(?:antiguo|antigüedad|antique|vintage)',
-                    r'(?:colección|collection) (?:pasada|anterior|old)'
-                ]
-                
-                current_indicators = [
-                    r'(?:nuevo|actual|vigente|new|current)',
-                    r'(?:disponible|en stock|available|in stock)',
-                    r'(?:versión actual|último modelo|current version|latest model)',
-                    r'(?:reciente|recién|recent|recently)',
-                    r'(?:comprar|compra ahora|buy|buy now)',
-                    r'(?:añadir al carrito|add to cart)',
-                    r'(?:precio actual|current price)',
-                    r'(?:envío|shipping) (?:gratis|gratuito|free)'
-                ]
-                
-                historical_score = 0
-                current_score = 0
-                
-                for pattern in historical_indicators:
-                    if re.search(pattern, context, re.IGNORECASE):
-                        historical_score += 1
-                
-                for pattern in current_indicators:
-                    if re.search(pattern, context, re.IGNORECASE):
-                        current_score += 1
-                
-                if historical_score > current_score:
-                    assessment = "Histórico"
-                elif current_score > historical_score:
-                    assessment = "Actual"
-                
-                # Limpiar y formatear el snippet
-                snippet = re.sub(r'\s+', ' ', context).strip()
-                
-                # Verificar si este hallazgo es único (evitar duplicados)
-                is_duplicate = False
-                for existing in findings:
-                    if existing["snippet"] == snippet:
-                        is_duplicate = True
-                        break
-                
-                if not is_duplicate:
-                    findings.append({
-                        "product_name": product_name,
-                        "date_clue": date_clue,
-                        "assessment": assessment,
-                        "snippet": snippet,
-                        "url": url
-                    })
+            # Omitir menciones cuyo contexto se solapa en más de la mitad con el hallazgo anterior
+            if last_span and min(end, last_span[1]) - max(start, last_span[0]) > (end - start) / 2:
+                continue
+            
+            context = content[start:end]
+            
+            # Buscar nombre del producto con patrones ampliados
+            product_name = "No identificado"
+            for product_pattern in self._PRODUCT_PATTERNS:
+                product_match = product_pattern.search(context)
+                if product_match:
+                    product_name = product_match.group(1).strip()
+                    break
+            
+            # Si no se encontró un nombre de producto, intentar extraerlo del título de la página
+            if product_name == "No identificado" and page_title:
+                product_name = page_title
+            
+            # Buscar pistas temporales con patrones ampliados
+            date_clue = "No identificado"
+            for date_pattern in self._DATE_PATTERNS:
+                date_match = date_pattern.search(context)
+                if date_match:
+                    if date_match.groups():
+                        date_clue = date_match.group(1).strip()
+                    else:
+                        date_clue = date_match.group(0).strip()
+                    break
+            
+            # Evaluar si es histórico con indicadores ampliados
+            assessment = "Indeterminado"
+            historical_score = 0
+            current_score = 0
+            if self._ANY_INDICATOR_RE.search(context):
+                # Cada indicador se busca por separado: las coincidencias de uno no ocultan las de otro
+                historical_score = sum(1 for pattern in self._HISTORICAL_INDICATORS if pattern.search(context))
+                current_score = sum(1 for pattern in self._CURRENT_INDICATORS if pattern.search(context))
+            
+            if historical_score > current_score:
+                assessment = "Histórico"
+            elif current_score > historical_score:
+                assessment = "Actual"
+            
+            # Limpiar y formatear el snippet
+            snippet = self._WHITESPACE_RE.sub(' ', context).strip()
+            
+            # Verificar si este hallazgo es único (evitar duplicados)
+            if snippet in seen_snippets:
+                continue
+            seen_snippets.add(snippet)
+            last_span = (start, end)
+            
+            findings.append({
+                "product_name": product_name,
+                "date_clue": date_clue,
+                "assessment": assessment,
+                "snippet": snippet,
+                "snippet_short": snippet[:SNIPPET_PREVIEW_LENGTH],
+                "url": url
+            })
+            if len(findings) >= self.max_findings_per_url:
+                break
         
         # Si no se encontraron menciones exactas del EAN, buscar información general de la página
-        if not findings and self.ean in content:
+        if not findings:
             # Extraer un fragmento general donde aparece el EAN
             ean_pos = content.find(self.ean)
             start = max(0, ean_pos - 400)
@@ -588,15 +832,16 @@ class EANHistoryFinder:
             product_name = "No identificado"
             
             # Intentar extraer del título de la página
-            title_match = re.search(r'<title[^>]*>(.*?)</title>', content, re.IGNORECASE | re.DOTALL)
-            if title_match:
-                product_name = title_match.group(1).strip()
+            if page_title:
+                product_name = page_title
             
+            snippet = self._WHITESPACE_RE.sub(' ', context).strip()
             findings.append({
                 "product_name": product_name,
                 "date_clue": "No identificado",
                 "assessment": "Indeterminado",
-                "snippet": re.sub(r'\s+', ' ', context).strip(),
+                "snippet": snippet,
+                "snippet_short": snippet[:SNIPPET_PREVIEW_LENGTH],
                 "url": url
             })
         
@@ -615,18 +860,23 @@ class EANHistoryFinder:
         Args:
             results (List[Dict]): Lista de resultados encontrados.
         """
+        # El informe se emite completo a nivel INFO; si no se va a mostrar, no formatearlo
+        if not logging.getLogger().isEnabledFor(logging.INFO):
+            return
+        info = logging.info
+        
         if not results:
-            logging.info("\n" + "=" * 50)
-            logging.info("No se encontraron resultados para el EAN proporcionado.")
-            logging.info("Posibles razones:")
-            logging.info("- El EAN no existe o no es común en fuentes públicas.")
-            logging.info("- No hay información histórica disponible en línea.")
-            logging.info("- Las fuentes que contienen esta información no son accesibles mediante scraping.")
-            logging.info("=" * 50)
+            info("\n" + "=" * 50)
+            info("No se encontraron resultados para el EAN proporcionado.")
+            info("Posibles razones:")
+            info("- El EAN no existe o no es común en fuentes públicas.")
+            info("- No hay información histórica disponible en línea.")
+            info("- Las fuentes que contienen esta información no son accesibles mediante scraping.")
+            info("=" * 50)
             return
         
         # Agrupar hallazgos por tipo de evaluación
-        findings_by_assessment = {"Histórico": [], "Actual": [], "Indeterminado": [], "OFProduct": [], "Wayback": [], "Amazon": []}
+        findings_by_assessment = {key: [] for _, key in REPORT_SECTIONS}
         
         for result in results:
             for finding in result["findings"]:
@@ -634,152 +884,122 @@ class EANHistoryFinder:
                 findings_by_assessment[assessment].append(finding)
         
         # Mostrar resumen
-        logging.info("\n" + "=" * 50)
-        logging.info("RESUMEN DE RESULTADOS")
-        logging.info("=" * 50)
+        info("\n" + "=" * 50)
+        info("RESUMEN DE RESULTADOS")
+        info("=" * 50)
         
         total_findings = sum(len(findings) for findings in findings_by_assessment.values())
-        logging.info(f"Total de hallazgos: {total_findings}")
+        info(f"Total de hallazgos: {total_findings}")
         
         for assessment, findings in findings_by_assessment.items():
-            logging.info(f"- {assessment}: {len(findings)}")
+            info(f"- {assessment}: {len(findings)}")
         
         # Mostrar hallazgos detallados por tipo de evaluación
-        logging.info("\n" + "=" * 50)
-        logging.info("RESULTADOS DETALLADOS")
-        logging.info("=" * 50)
+        info("\n" + "=" * 50)
+        info("RESULTADOS DETALLADOS")
+        info("=" * 50)
         
-        # Primero mostrar hallazgos históricos
-        if findings_by_assessment["Histórico"]:
-            logging.info("\nHALLAZGOS HISTÓRICOS:")
-            logging.info("-" * 50)
-            
-            for i, finding in enumerate(findings_by_assessment["Histórico"], 1):
-                logging.info(f"Hallazgo #{i}:")
-                logging.info(f"  URL: {finding['url']}")
-                logging.info(f"  Producto: {finding['product_name']}")
-                logging.info(f"  Pista temporal: {finding['date_clue']}")
-                logging.info(f"  Fragmento: \"{finding['snippet'][:200]}...\"")
-                logging.info("-" * 50)
-        
-        # Luego mostrar hallazgos actuales
-        if findings_by_assessment["Actual"]:
-            logging.info("\nHALLAZGOS ACTUALES:")
-            logging.info("-" * 50)
-            
-            for i, finding in enumerate(findings_by_assessment["Actual"], 1):
-                logging.info(f"Hallazgo #{i}:")
-                logging.info(f"  URL: {finding['url']}")
-                logging.info(f"  Producto: {finding['product_name']}")
-                logging.info(f"  Pista temporal: {finding['date_clue']}")
-                logging.info(f"  Fragmento: \"{finding['snippet'][:200]}...\"")
-                logging.info("-" * 50)
-        
-        # Finalmente mostrar hallazgos indeterminados
-        if findings_by_assessment["Indeterminado"]:
-            logging.info("\nHALLAZGOS INDETERMINADOS:")
-            logging.info("-" * 50)
-            
-            for i, finding in enumerate(findings_by_assessment["Indeterminado"], 1):
-                logging.info(f"Hallazgo #{i}:")
-                logging.info(f"  URL: {finding['url']}")
-                logging.info(f"  Producto: {finding['product_name']}")
-                logging.info(f"  Pista temporal: {finding['date_clue']}")
-                logging.info(f"  Fragmento: \"{finding['snippet'][:200]}...\"")
-                logging.info("-" * 50)
-        
-        # Mostrar hallazgos de OpenFoodFacts
-        if findings_by_assessment["OFProduct"]:
-            logging.info("\nHALLAZGOS DE OPENFOODFACTS:")
-            logging.info("-" * 50)
-            
-            for i, finding in enumerate(findings_by_assessment["OFProduct"], 1):
-                logging.info(f"Hallazgo #{i}:")
-                logging.info(f"  URL: {finding['url']}")
-                logging.info(f"  Producto: {finding['product_name']}")
-                logging.info(f"  Pista temporal: {finding['date_clue']}")
-                logging.info(f"  Fragmento: \"{finding['snippet'][:200]}...\"")
-                logging.info("-" * 50)
-        
-        # Mostrar hallazgos de Wayback Machine
-        if findings_by_assessment["Wayback"]:
-            logging.info("\nHALLAZGOS DE WAYBACK MACHINE:")
-            logging.info("-" * 50)
-            
-            for i, finding in enumerate(findings_by_assessment["Wayback"], 1):
-                logging.info(f"Hallazgo #{i}:")
-                logging.info(f"  URL: {finding['url']}")
-                logging.info(f"  Producto: {finding['product_name']}")
-                logging.info(f"  Pista temporal: {finding['date_clue']}")
-                logging.info(f"  Fragmento: \"{finding['snippet'][:200]}...\"")
-                logging.info("-" * 50)
-        
-        # Mostrar hallazgos de Amazon
-        if findings_by_assessment["Amazon"]:
-            logging.info("\nHALLAZGOS DE AMAZON:")
-            logging.info("-" * 50)
+        # Mostrar cada grupo con un único registro de log
+        for header, key in REPORT_SECTIONS:
+            findings = findings_by_assessment[key]
+            if findings:
+                info(self._render_findings(header, findings))
+    
+    @staticmethod
+    def _render_findings(header: str, findings: List[Dict]) -> str:
+        """
+        Construye el bloque de texto de un grupo de hallazgos para emitirlo en un solo registro.
+        
+        Args:
+            header (str): Título del grupo (por ejemplo, "HALLAZGOS ACTUALES").
+            findings (List[Dict]): Hallazgos del grupo.
             
-            for i, finding in enumerate(findings_by_assessment["Amazon"], 1):
-                logging.info(f"Hallazgo #{i}:")
-                logging.info(f"  URL: {finding['url']}")
-                logging.info(f"  Producto: {finding['product_name']}")
-                logging.info(f"  Pista temporal: {finding['date_clue']}")
-                logging.info(f"  Fragmento: \"{finding['snippet'][:200]}...\"")
-                logging.info("-" * 50)
+        Returns:
+            str: Bloque multilínea con todos los hallazgos del grupo.
+        """
+        separator = "-" * 50
+        parts = [f"\n{header}:", separator]
+        parts.extend(
+            f"Hallazgo #{i}:\n"
+            f"  URL: {finding['url']}\n"
+            f"  Producto: {finding['product_name']}\n"
+            f"  Pista temporal: {finding['date_clue']}\n"
+            f"  Fragmento: \"{finding['snippet_short']}...\"\n"
+            f"{separator}"
+            for i, finding in enumerate(findings, 1)
+        )
+        return "\n".join(parts)
     
-    def save_results_to_csv(self, results: List[Dict], filename: str = None) -> str:
+    def save_results_to_csv(self, results: Iterable[Dict], filename: str = None) -> str:
         """
         Guarda los resultados en un archivo CSV.
         
         Args:
-            results (List[Dict]): Lista de resultados encontrados.
+            results (Iterable[Dict]): Resultados encontrados; puede ser un iterador (p. ej. iter_search())
+                cuyas filas se escriben a medida que llegan. Siempre se consume por completo,
+                aunque falle la escritura del CSV.
             filename (str, optional): Nombre del archivo CSV. Si es None, se genera automáticamente.
             
         Returns:
             str: Ruta del archivo CSV generado.
         """
-        if not results:
+        # Esperar al primer resultado antes de crear el archivo
+        results = iter(results)
+        first_result = next(results, None)
+        if first_result is None:
             return ""
         
         # Generar nombre de archivo si no se proporciona
         if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
             filename = f"ean_{self.ean}_results_{timestamp}.csv"
         
         # Asegurar que la ruta sea absoluta
         if not os.path.isabs(filename):
-            filename = os.path.join(os.getcwd(), filename)
+            filename = os.path.join(self._cwd, filename)
         
-        # Preparar datos para CSV
-        csv_data = []
+        # Escribir CSV directamente desde los resultados, sin copia intermedia.
+        # Solo se capturan los errores de escritura: los del iterador de resultados (la búsqueda)
+        # se propagan, y si el CSV falla se siguen consumiendo los resultados para que la
+        # búsqueda termine igualmente
+        csvfile = None
+        write_error = None
+        try:
+            csvfile = open(filename, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE)
+            writer = csv.writer(csvfile, dialect=CSV_DIALECT)
+            writer.writerow(CSV_FIELDNAMES)
+        except (OSError, csv.Error) as e:
+            write_error = e
         
-        for result in results:
-            for finding in result["findings"]:
-                csv_data.append({
-                    "EAN": self.ean,
-                    "URL": finding["url"],
-                    "Producto": finding["product_name"],
-                    "Pista_Temporal": finding["date_clue"],
-                    "Evaluacion": finding["assessment"],
-                    "Fragmento": finding["snippet"]
-                })
-        
-        # Escribir CSV
         try:
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ["EAN", "URL", "Producto", "Pista_Temporal", "Evaluacion", "Fragmento"]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for row in csv_data:
-                    writer.writerow(row)
-            
-            logging.info(f"\nResultados guardados en: {filename}")
-            return filename
-            
-        except Exception as e:
-            logging.error(f"Error al guardar resultados en CSV: {str(e)}")
+            for result in itertools.chain((first_result,), results):
+                if write_error is not None:
+                    continue
+                try:
+                    # writerows recorre las filas de cada resultado dentro del módulo csv (en C)
+                    writer.writerows(
+                        # Mismo orden que CSV_FIELDNAMES
+                        (self.ean, finding["url"], finding["product_name"], finding["date_clue"], finding["assessment"], finding["snippet"])
+                        for finding in result["findings"]
+                    )
+                except (OSError, csv.Error) as e:
+                    write_error = e
+        finally:
+            if csvfile is not None:
+                try:
+                    csvfile.close()
+                except OSError as e:
+                    write_error = write_error or e
+        
+        if write_error is not None:
+            logging.error(f"Error al guardar resultados en CSV: {str(write_error)}")
             return ""
+        
+        logging.info(f"\nResultados guardados en: {filename}")
+        return filename
+
+# Parser de argumentos, construido la primera vez que se usa
+_PARSER: Optional[argparse.ArgumentParser] = None
 
 def parse_arguments() -> argparse.Namespace:
     """
@@ -787,24 +1007,28 @@ def parse_arguments() -> argparse.Namespace:
     Returns:
         argparse.Namespace: Argumentos parseados.
     """
-    parser = argparse.ArgumentParser(description="Buscador Histórico de EANs (WebScraping)")
-    parser.add_argument("ean", help="Número EAN a buscar (8, 13 o 14 dígitos)")
-    parser.add_argument("--max-results", type=int, default=10, help="Número máximo de resultados por término")
-    parser.add_argument("--lang", type=str, default="es", help="Idioma de búsqueda (por ejemplo, es, en, fr)")
-    parser.add_argument("--proxy", action="append", help="Proxy HTTP/S a usar (puede usarse varias veces)")
-    parser.add_argument("--log-level", type=str, default="INFO", help="Nivel de logging (DEBUG, INFO, WARNING, ERROR)")
-    parser.add_argument("--log-file", type=str, default=None, help="Archivo para guardar logs")
-    return parser.parse_args()
+    global _PARSER
+    if _PARSER is None:
+        _PARSER = argparse.ArgumentParser(description="Buscador Histórico de EANs (WebScraping)")
+        _PARSER.add_argument("ean", help="Número EAN a buscar (8, 13 o 14 dígitos)")
+        _PARSER.add_argument("--max-results", type=int, default=10, help="Número máximo de resultados por término")
+        _PARSER.add_argument("--lang", type=str, default="es", help="Idioma de búsqueda (por ejemplo, es, en, fr)")
+        _PARSER.add_argument("--proxy", action="append", help="Proxy HTTP/S a usar (puede usarse varias veces)")
+        _PARSER.add_argument("--log-level", type=str, default="INFO", help="Nivel de logging (DEBUG, INFO, WARNING, ERROR)")
+        _PARSER.add_argument("--log-file", type=str, default=None, help="Archivo para guardar logs")
+        _PARSER.add_argument("--no-cache", action="store_true", help="No reutilizar respuestas HTTP cacheadas en disco")
+    return _PARSER.parse_args()
 
 def setup_logging(level: str, log_file: Optional[str] = None):
     numeric_level = getattr(logging, level.upper(), None)
     handlers = [logging.StreamHandler(sys.stdout)]
     if log_file:
-        handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+        handlers.append(BufferedFileHandler(log_file, encoding="utf-8"))
     logging.basicConfig(
         level=numeric_level,
         format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=handlers
+        handlers=handlers,
+        force=True  # reemplaza la configuración por defecto aplicada al importar el módulo
     )
 
 def main():
@@ -816,19 +1040,23 @@ def main():
             args.ean,
             proxies=args.proxy,
             max_results=args.max_results,
-            lang=args.lang
+            lang=args.lang,
+            use_cache=not args.no_cache
         )
-        results = finder.search()
+        # Escribir cada resultado en el CSV según llega, conservándolo para el informe final
+        results = []
+        def stream_results():
+            for result in finder.iter_search():
+                results.append(result)
+                yield result
+        finder.save_results_to_csv(stream_results())
         finder.format_results(results)
-        if results:
-            finder.save_results_to_csv(results)
     except KeyboardInterrupt:
         logging.error("\n\nOperación cancelada por el usuario.")
         sys.exit(1)
     except Exception as e:
-        logging.error(f"\n\nError inesperado: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        # logging.exception incluye el traceback y lo envía por los mismos handlers
+        logging.exception(f"\n\nError inesperado: {str(e)}")
         sys.exit(1)
 
 if __name__ == "__main__":